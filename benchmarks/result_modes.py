@@ -0,0 +1,93 @@
+'''
+Compares rows/sec and peak memory of the DataFrame, record and column result
+modes of ComtradeRequest against a local mock server.
+
+Each mode runs in a fresh subprocess, whose peak resident set size covers
+memory allocated outside of Python's allocator too (e.g. by pandas' parser
+or the Arrow memory pool).  The "import only" row is the peak of a process
+which imports uncomtrader without pulling anything.
+
+Usage:
+    python benchmarks/result_modes.py [n_rows]
+'''
+
+from os.path import dirname, join
+from time import perf_counter
+
+import resource
+import subprocess
+import sys
+
+
+HEADER = ('Classification,Year,Period,Trade Flow Code,Reporter Code,Reporter,'
+          'Partner Code,Partner,Commodity Code,Commodity,Qty,Netweight (kg),'
+          'Trade Value (US$),Flag\n')
+ROW = 'H4,2016,2016,1,{0},Reporter {0},36,Australia,4401,"Fuel wood, in logs",,{1},{2},0\n'
+
+MODES = {
+    'import only' : lambda req: 0,
+    'pull_data' : lambda req: len(req.pull_data()),
+    'pull_records' : lambda req: sum(1 for _ in req.pull_records()),
+    'pull_columns' : lambda req: len(req.pull_columns()['Year']),
+    'pull_columns(arrow=True)' : lambda req: req.pull_columns(arrow=True).num_rows,
+}
+
+
+def _peak_mb():
+    # on Linux ru_maxrss is inherited from the parent process across exec, so
+    # prefer the high water mark of this process' own address space
+    try:
+        with open('/proc/self/status', 'r') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1e3
+    except IOError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+def _bench(mode, url):
+    # run in the subprocess
+    from uncomtrader import ComtradeRequest
+
+    req = ComtradeRequest(url=url)
+    start = perf_counter()
+    n_rows = MODES[mode](req)
+    elapsed = perf_counter() - start
+    print(n_rows, elapsed, _peak_mb())
+
+
+def main(n_rows=200000):
+    # the mock server of the test suite; imported here rather than at the top
+    # so that the subprocesses don't pay for importing pytest
+    sys.path.insert(0, join(dirname(__file__), '..', 'tests'))
+    from conftest import serve
+
+    body = (HEADER + ''.join(ROW.format(i % 300, i * 7, i * 13)
+                             for i in range(n_rows))).encode('utf-8')
+
+    print('{0} rows, {1:.1f} MB response'.format(n_rows, len(body) / 1e6))
+    print('{0:<26}{1:>12}{2:>16}'.format('mode', 'rows/sec', 'peak RSS MB'))
+
+    with serve({'bench' : body}) as base_url:
+        url = base_url + 'bench/api/get?fmt=csv'
+        for mode in MODES:
+            proc = subprocess.run([sys.executable, __file__, '--mode', mode, url],
+                                  stdout=subprocess.PIPE, universal_newlines=True)
+            if proc.returncode != 0:
+                print('{0:<26}{1:>12}'.format(mode, 'failed'))
+                continue
+
+            n, elapsed, peak = map(float, proc.stdout.split())
+            rate = '{:,.0f}'.format(n / elapsed) if n else '-'
+            print('{0:<26}{1:>12}{2:>16.1f}'.format(mode, rate, peak))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--mode']:
+        _bench(*sys.argv[2:4])
+    else:
+        main(*map(int, sys.argv[1:]))
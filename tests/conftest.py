@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import threading
+
+
+class MockComtrade(BaseHTTPRequestHandler):
+    '''Serves the body in `responses` named by the first component of the request path.'''
+
+    responses = {}
+
+    def do_GET(self):
+        body = self.responses[self.path.split('/')[1]]
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve(responses):
+    '''Runs a MockComtrade server in a background thread, yielding its base URL.'''
+
+    handler = type('MockComtrade', (MockComtrade,), {'responses' : responses})
+    server = HTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:{}/'.format(server.server_port)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope='module')
+def mock_server(request):
+    '''Serves the `mock_responses` of the requesting test module.'''
+
+    with serve(request.module.mock_responses) as url:
+        yield url
@@ -0,0 +1,129 @@
+import pytest
+from multiprocessing import Process
+
+from uncomtrader import WorkQueue, Worker
+
+
+# responses of the mock server, by the first component of the request path
+mock_responses = {
+    'csv' : 'Period,Reporter Code,Commodity Code,Trade Value (US$)\n2016,36,4401,1\n2016,36,4401,2\n',
+    'nodata' : 'No data matches your query or your query is too complex.',
+    'broken' : '<html>Not json</html>',
+}
+
+
+def test_add_plan(tmpdir):
+    '''Test plans are sharded beyond the MultiRequest limit.'''
+    queue = WorkQueue(str(tmpdir.join('queue.db')))
+    n = queue.add_plan(trade_type="C", hs=list(range(4401, 4431)),
+            partner_area=36, freq='A', reporting_area="all",
+            time_period=list(range(2000, 2016)))
+
+    assert n == 8
+    assert queue.status()['pending'] == 8
+
+    # re-adding the same plan is a no-op
+    assert queue.add_plan(trade_type="C", hs=list(range(4401, 4431)),
+            partner_area=36, freq='A', reporting_area="all",
+            time_period=list(range(2000, 2016))) == 0
+
+
+def test_expired_leases_are_requeued(tmpdir):
+    '''Test a request is handed out again once its lease expires.'''
+    queue = WorkQueue(str(tmpdir.join('queue.db')), lease=-1)
+    queue.add(['http://comtrade.un.org/api/get?fmt=csv&ps=2016'])
+
+    task_id, url = queue.claim('a')
+    assert queue.claim('b') == (task_id, url)
+
+    # the worker that lost its lease can no longer complete the request
+    assert queue.status()['claimed'] == 1
+    queue.fail(task_id, 'a', 'too late')
+    assert queue.status()['claimed'] == 1
+
+
+def test_expired_leases_count_as_attempts(tmpdir):
+    '''Test a request whose lease keeps expiring is given up on.'''
+    queue = WorkQueue(str(tmpdir.join('queue.db')), lease=-1, max_attempts=2)
+    queue.add(['http://comtrade.un.org/api/get?fmt=csv&ps=2016'])
+
+    queue.claim('a')
+    queue.claim('b')
+    assert queue.requeue_expired() == 1
+    assert queue.claim('c') is None
+    assert queue.status()['failed'] == 1
+
+
+def test_failed_requests_are_retried(tmpdir):
+    '''Test requests are given up on after max_attempts failures.'''
+    queue = WorkQueue(str(tmpdir.join('queue.db')), max_attempts=2)
+    queue.add(['http://comtrade.un.org/api/get?fmt=csv&ps=2016'])
+
+    for _ in range(2):
+        task_id, url = queue.claim('a')
+        queue.fail(task_id, 'a', 'boom')
+
+    assert queue.claim('a') is None
+    assert queue.status()['failed'] == 1
+
+
+def test_worker_survives_broken_responses(tmpdir, mock_server):
+    '''Test malformed responses are recorded as failures and retried.'''
+    queue = WorkQueue(str(tmpdir.join('queue.db')), max_attempts=2)
+    queue.add_plan(base_url=mock_server + 'broken/api/get?', fmt='json',
+            trade_type="C", hs=4401, partner_area=36, freq='A',
+            reporting_area="all", time_period=2016)
+
+    assert Worker(queue, name='a').run(verbose=False) == 0
+    assert queue.status()['failed'] == 1
+
+
+def test_no_data_is_not_retried(tmpdir, mock_server):
+    '''Test "No data" answers fail without spending more requests.'''
+    queue = WorkQueue(str(tmpdir.join('queue.db')))
+    queue.add_plan(base_url=mock_server + 'nodata/api/get?', trade_type="C",
+            hs=4401, partner_area=36, freq='A', reporting_area="all",
+            time_period=2016)
+
+    worker = Worker(queue, name='a')
+    assert worker.run(verbose=False, ignore_errors=False) == 0
+    assert queue.status()['failed'] == 1
+    assert queue._conn.execute('SELECT attempts FROM tasks').fetchone() == (1,)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json"])
+def test_ignored_no_data_is_done(tmpdir, mock_server, fmt):
+    '''Test ignored "No data" answers complete with a single request.'''
+    queue = WorkQueue(str(tmpdir.join('queue.db')))
+    queue.add_plan(base_url=mock_server + 'nodata/api/get?', fmt=fmt,
+            trade_type="C", hs=4401, partner_area=36, freq='A',
+            reporting_area="all", time_period=2016)
+
+    with pytest.warns(UserWarning):
+        assert Worker(queue, name='a').run(verbose=False) == 1
+    assert queue.status()['done'] == 1
+    assert queue._conn.execute('SELECT attempts FROM tasks').fetchone() == (0,)
+    assert queue.results().empty
+
+
+def _run_worker(fpath, name):
+    Worker(fpath, name=name).run(verbose=False)
+
+
+def test_workers(tmpdir, mock_server):
+    '''Test several worker processes drain a queue against a mock server.'''
+    fpath = str(tmpdir.join('queue.db'))
+    queue = WorkQueue(fpath)
+    queue.add_plan(base_url=mock_server + 'csv/api/get?', trade_type="C", hs=4401,
+            partner_area=36, freq='A', reporting_area="all",
+            time_period=list(range(2000, 2016)))
+
+    procs = [Process(target=_run_worker, args=(fpath, 'worker{}'.format(i)))
+             for i in range(2)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    assert queue.status()['done'] == 4
+    assert queue.results().shape == (8, 4)
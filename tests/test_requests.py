@@ -1,5 +1,7 @@
+import json
 import pandas as pd
 import pytest
+import warnings
 from time import sleep
 
 from uncomtrader import ComtradeRequest, MultiRequest
@@ -7,6 +9,27 @@ from uncomtrader import ComtradeRequest, MultiRequest
 # whether to skip actual request calls
 skip = False
 
+# responses of the mock server, by the first component of the request path
+mock_responses = {
+    'csv' : 'Year,Reporter,Empty,Qty,Trade Value (US$)\n'
+            '2016,"Australia, Oceania",,1.5,10\n'
+            '\n'
+            '2016,Austria\n',
+    'json' : json.dumps({'dataset' : [
+            {'yr' : 2016, 'rtTitle' : 'Australia', 'empty' : None, 'qty' : 1.5, 'TradeValue' : 10},
+            {'yr' : 2016, 'rtTitle' : 'Austria', 'empty' : None, 'qty' : None, 'TradeValue' : 20}]}),
+    'mixed' : json.dumps({'dataset' : [{'yr' : 2016}, {'yr' : 2017, 'rtTitle' : 'Austria'}]}),
+    'nodata' : 'No data matches your query or your query is too complex.',
+    'limit' : 'Usage limit exceeded\nfor this, hour, try again\n',
+    'broken' : '<html>Usage limit exceeded</html>',
+}
+
+
+@pytest.fixture(scope='module')
+def mock_url(mock_server):
+    return mock_server + '{}/api/get?fmt={}'
+
+
 @pytest.mark.parametrize("attr,val", [
     ("partner_area",36),
     ("reporting_area","all"),
@@ -59,6 +82,34 @@ def test_simple_json_request():
     assert df.shape == (3, 29)
 
 
+@pytest.mark.skipif(skip,
+    reason="Prevent using up unecessary requests accidentally.")
+def test_simple_records_request():
+    '''Test a simple request returning records.'''
+    sleep(1)
+    req = ComtradeRequest(trade_type="C", hs=4401,
+            partner_area=36, freq='A',
+            reporting_area="all", time_period=2016)
+
+    records = list(req.pull_records())
+    assert len(records) == 3
+    assert len(records[0]) == 35
+
+
+@pytest.mark.skipif(skip,
+    reason="Prevent using up unecessary requests accidentally.")
+def test_simple_columns_request():
+    '''Test a simple request returning columns.'''
+    sleep(1)
+    req = ComtradeRequest(trade_type="C", hs=4401,
+            partner_area=36, freq='A',
+            reporting_area="all", time_period=2016)
+
+    columns = req.pull_columns()
+    assert len(columns) == 22
+    assert all(len(col) == 3 for col in columns.values())
+
+
 @pytest.mark.skipif(skip,
     reason="Prevent using up unecessary requests accidentally.")
 def test_simple_multirequest():
@@ -84,3 +135,103 @@ def test_simple_multirequest():
 
     df = req.pull_data()
     assert df.shape == (3, 22)
+
+
+def test_csv_records(mock_url):
+    '''Test records skip blank lines and pad short rows like pull_data.'''
+    req = ComtradeRequest(url=mock_url.format('csv', 'csv'))
+    records = list(req.pull_records())
+
+    assert len(records) == 2
+    assert records[0]['Reporter'] == 'Australia, Oceania'
+    assert records[1] == {'Year' : '2016', 'Reporter' : 'Austria', 'Empty' : '',
+                          'Qty' : '', 'Trade Value (US$)' : ''}
+
+    # pull_data accepts the same response
+    assert req.pull_data().shape == (2, 4)
+
+
+def test_json_records(mock_url):
+    '''Test records of a json request.'''
+    req = ComtradeRequest(url=mock_url.format('json', 'json'))
+    records = list(req.pull_records())
+
+    assert [rec['rtTitle'] for rec in records] == ['Australia', 'Austria']
+    assert records[1]['qty'] is None
+
+
+@pytest.mark.parametrize("fmt,columns", [
+    ("csv", ['Year', 'Reporter', 'Qty', 'Trade Value (US$)']),
+    ("json", ['yr', 'rtTitle', 'qty', 'TradeValue']),
+])
+def test_columns(mock_url, fmt, columns):
+    '''Test columns are typed and empty columns are dropped.'''
+    pytest.importorskip('pyarrow')
+    req = ComtradeRequest(url=mock_url.format(fmt, fmt))
+    data = req.pull_columns()
+
+    assert list(data) == columns
+    assert data[columns[0]].dtype == 'int64'
+    assert data[columns[2]].dtype == 'float64'
+    assert list(data[columns[1]])[1] == 'Austria'
+
+    table = req.pull_columns(arrow=True)
+    assert table.column_names == columns
+    assert table.num_rows == 2
+
+
+def test_json_columns_union_keys(mock_url):
+    '''Test keys missing from the first json record are kept.'''
+    pytest.importorskip('pyarrow')
+    req = ComtradeRequest(url=mock_url.format('mixed', 'json'))
+    data = req.pull_columns()
+
+    assert list(data) == ['yr', 'rtTitle']
+    assert list(data['rtTitle']) == [None, 'Austria']
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json"])
+def test_no_data(mock_url, fmt):
+    '''Test "No data" responses raise, or return nothing if ignored.'''
+    req = ComtradeRequest(url=mock_url.format('nodata', fmt))
+
+    with pytest.raises(IOError):
+        req.pull_data()
+    with pytest.raises(IOError):
+        req.pull_records()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert req.pull_data(ignore_errors=True).empty
+        assert list(req.pull_records(ignore_errors=True)) == []
+
+        pytest.importorskip('pyarrow')
+        assert req.pull_columns(ignore_errors=True) == {}
+        assert req.pull_columns(ignore_errors=True, arrow=True).num_rows == 0
+
+
+@pytest.mark.parametrize("name,fmt", [
+    ("limit", "csv"),
+    ("broken", "json"),
+])
+def test_usage_limit(mock_url, name, fmt):
+    '''Test malformed responses raise the usage limit error.'''
+    req = ComtradeRequest(url=mock_url.format(name, fmt))
+
+    with pytest.raises(IOError):
+        list(req.pull_records())
+
+    pytest.importorskip('pyarrow')
+    for arrow in [False, True]:
+        with pytest.raises(IOError):
+            req.pull_columns(arrow=arrow)
+
+
+def test_multirequest_records(mock_url):
+    '''Test records of all requests of a multi request are chained.'''
+    req = MultiRequest(url=mock_url.format('csv', 'csv'),
+            hs=list(range(4401, 4422)), time_period=2016)
+    records = list(req.pull_records(verbose=False))
+
+    assert req.nrequests == 2
+    assert len(records) == 4
@@ -1 +1,2 @@
 from uncomtrader.uncomtrader import ComtradeRequest, MultiRequest
+from uncomtrader.distributed import WorkQueue, Worker
@@ -0,0 +1,338 @@
+from contextlib import contextmanager
+from io import StringIO
+from os import getpid
+from socket import gethostname
+from time import time
+from .uncomtrader import ComtradeURL, ComtradeRequest, _partition
+
+import json
+import pandas as pd
+import sqlite3
+
+
+class WorkQueue(object):
+    '''
+    Durable work queue of UN Comtrade requests backed by a SQLite file.
+
+    Any number of Workers (in separate processes, or on separate hosts
+    sharing the queue file) can claim requests from the same queue; each
+    claim holds a lease, and requests whose lease expires before they are
+    completed are handed out again.
+
+    Note that SQLite relies on file locking, so a queue shared between hosts
+    must live on a filesystem with working locks (e.g. NFSv4 with locking
+    enabled).
+
+    Inputs:
+        fpath (string) : location of the SQLite queue file (created if missing)
+        lease (number) : seconds a claimed request is held before being re-queued
+        max_attempts (int) : number of failed attempts before a request is given up on
+        timeout (number) : seconds to wait on a locked queue file
+    '''
+
+    def _setup(self):
+        with self._transaction() as cur:
+            cur.execute('''CREATE TABLE IF NOT EXISTS tasks (
+                               id INTEGER PRIMARY KEY AUTOINCREMENT,
+                               url TEXT UNIQUE NOT NULL,
+                               status TEXT NOT NULL DEFAULT 'pending',
+                               worker TEXT,
+                               expires REAL,
+                               attempts INTEGER NOT NULL DEFAULT 0,
+                               error TEXT,
+                               data TEXT)''')
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front so that two workers
+        # can never claim the same request
+        cur = self._conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        try:
+            yield cur
+        except:
+            cur.execute('ROLLBACK')
+            raise
+        else:
+            cur.execute('COMMIT')
+        finally:
+            cur.close()
+
+    def add(self, urls):
+        '''Adds request URLs to the queue; URLs already queued are ignored.
+
+        Inputs (required):
+            urls (list) : request URLs (strings) or ComtradeURL instances
+        Output:
+            number of requests added
+        '''
+
+        urls = [getattr(url, 'base_url', url) for url in urls]
+        with self._transaction() as cur:
+            before = cur.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+            cur.executemany('INSERT OR IGNORE INTO tasks (url) VALUES (?)',
+                            [(url,) for url in urls])
+            after = cur.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+
+        return after - before
+
+    def add_plan(self, hs=[], time_period=[], base_url=None, fmt='csv', **kwargs):
+        '''
+        Shards a request into allowable requests and adds them to the queue.
+        Accepts the same inputs as MultiRequest, but without its limit of 100
+        requests.
+
+        Inputs (all optional):
+            hs : a commodity code (or list of) from the Harmonized System
+            time_period : Time period(s) for data
+            base_url (string) : API endpoint to query instead of UN Comtrade
+            fmt : 'csv' or 'json', format to pull data in
+            **kwargs : remaining ComtradeURL inputs (partner_area, reporting_area, ...)
+        Output:
+            number of requests added
+        '''
+
+        if base_url:
+            kwargs['url'] = '{}fmt={}'.format(base_url, fmt)
+        else:
+            kwargs['fmt'] = fmt
+
+        reqs = []
+        for hs_val in _partition(hs, 20):
+            for ts_val in _partition(time_period, 5):
+                reqs.append(ComtradeURL(hs=hs_val, time_period=ts_val, **kwargs))
+
+        return self.add(reqs)
+
+    def add_file(self, fpath):
+        '''Shards the request described in a .json file and adds it to the queue.
+
+        Inputs (required):
+            fpath (string): location of .json file; for an example, see data/multirequest.json
+                    in this repository.
+        Output:
+            number of requests added
+        '''
+
+        with open(fpath, 'r') as req_path:
+            args = json.load(req_path)
+
+        return self.add_plan(**args)
+
+    def _requeue_expired(self, cur, now):
+        # an expired lease counts as a failed attempt, so that a request which
+        # keeps killing its workers is eventually given up on
+        cur.execute('''UPDATE tasks SET attempts=attempts + 1, error='lease expired',
+                           status=CASE WHEN attempts + 1 >= ? THEN 'failed'
+                                       ELSE 'pending' END,
+                           worker=NULL, expires=NULL
+                       WHERE status='claimed' AND expires < ?''',
+                    (self.max_attempts, now))
+        return cur.rowcount
+
+    def requeue_expired(self):
+        '''
+        Returns requests whose lease has expired to the queue; each expiry
+        counts as a failed attempt.
+        '''
+
+        with self._transaction() as cur:
+            return self._requeue_expired(cur, time())
+
+    def claim(self, worker):
+        '''Leases the next pending request to `worker`.
+
+        Inputs (required):
+            worker (string) : identifier of the claiming worker
+        Output:
+            (task id, url) tuple, or None if nothing is left to claim
+        '''
+
+        now = time()
+        with self._transaction() as cur:
+            self._requeue_expired(cur, now)
+            row = cur.execute('''SELECT id, url FROM tasks WHERE status='pending'
+                                 ORDER BY id LIMIT 1''').fetchone()
+            if row is None:
+                return None
+
+            cur.execute('''UPDATE tasks SET status='claimed', worker=?, expires=?
+                           WHERE id=?''', (worker, now + self.lease, row[0]))
+
+        return row
+
+    def complete(self, task_id, worker, data):
+        '''Stores the data pulled for a request and marks it as done.
+
+        Results from workers which no longer hold the lease are discarded.
+
+        Inputs (required):
+            task_id (int) : id returned by `claim`
+            worker (string) : identifier of the worker holding the lease
+            data (DataFrame) : data pulled for the request
+        Output:
+            whether the result was accepted
+        '''
+
+        data = None if data.empty else data.to_csv(index=False)
+        with self._transaction() as cur:
+            cur.execute('''UPDATE tasks SET status='done', expires=NULL, data=?
+                           WHERE id=? AND worker=? AND status='claimed' ''',
+                        (data, task_id, worker))
+            return cur.rowcount == 1
+
+    def fail(self, task_id, worker, error, retry=True):
+        '''
+        Records a failed attempt at a request; the request is re-queued until
+        it has failed `max_attempts` times.
+
+        Inputs (required):
+            task_id (int) : id returned by `claim`
+            worker (string) : identifier of the worker holding the lease
+            error (string) : description of the failure
+        Inputs (optional):
+            retry (boolean) : whether the request may be retried at all
+        '''
+
+        max_attempts = self.max_attempts if retry else 0
+
+        with self._transaction() as cur:
+            cur.execute('''UPDATE tasks SET attempts=attempts + 1, error=?,
+                               status=CASE WHEN attempts + 1 >= ? THEN 'failed'
+                                           ELSE 'pending' END,
+                               worker=NULL, expires=NULL
+                           WHERE id=? AND worker=? AND status='claimed' ''',
+                        (str(error), max_attempts, task_id, worker))
+
+    def release(self, task_id, worker):
+        '''Returns a claimed request to the queue without counting an attempt.'''
+
+        with self._transaction() as cur:
+            cur.execute('''UPDATE tasks SET status='pending', worker=NULL, expires=NULL
+                           WHERE id=? AND worker=? AND status='claimed' ''',
+                        (task_id, worker))
+
+    def status(self):
+        '''Returns the number of requests in each state.'''
+
+        counts = {'pending' : 0, 'claimed' : 0, 'done' : 0, 'failed' : 0}
+        rows = self._conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status')
+        counts.update(dict(rows.fetchall()))
+        return counts
+
+    def results(self, save=False):
+        '''
+        Merges the data of all completed requests into a single DataFrame.
+
+        Inputs (optional):
+            save (string) : desired location to save data
+        '''
+
+        rows = self._conn.execute('''SELECT data FROM tasks
+                                     WHERE status='done' AND data IS NOT NULL
+                                     ORDER BY id''')
+        frames = [pd.read_csv(StringIO(data)) for (data,) in rows]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+        if save:
+            df.to_csv(save, index=False)
+            return None
+        else:
+            return df
+
+    def close(self):
+        self._conn.close()
+
+    def __init__(self, fpath, lease=300, max_attempts=3, timeout=60):
+        self.fpath = fpath
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(fpath, timeout=timeout, isolation_level=None)
+        self._setup()
+
+    def __repr__(self):
+        counts = self.status()
+        out = 'WorkQueue at {0} storing {1} Comtrade Requests ({2} done)'.format(
+            self.fpath, sum(counts.values()), counts['done'])
+        return out
+
+
+class Worker(object):
+    '''
+    Class for pulling requests from a WorkQueue until it is empty or the
+    worker's request budget is used up.  Run one Worker per process (and per
+    set of credentials).
+
+    Inputs:
+        queue (string or WorkQueue) : queue file location or WorkQueue instance
+        token (string) : optional UN Comtrade API token to authenticate requests with
+        max_reqs (int) : number of requests this worker may make (default 100)
+        name (string) : identifier of this worker (default 'host:pid')
+    '''
+
+    def run(self, verbose=True, ignore_errors=True):
+        '''
+        Claims and pulls requests until the queue is drained or the
+        request budget is used up.
+
+        Inputs (optional):
+            verbose (boolean) : whether to print current request
+            ignore_errors (boolean) : whether to ignore "No data" errors
+        Output:
+            number of requests completed by this worker
+        '''
+
+        req = None
+        n_done = 0
+
+        while req is None or req.n_reqs < self.max_reqs:
+            task = self.queue.claim(self.name)
+            if task is None:
+                break
+
+            task_id, url = task
+            if self.token:
+                url += '&token={}'.format(self.token)
+
+            if req is None:
+                req = ComtradeRequest(url=url, max_reqs=self.max_reqs)
+            else:
+                # maintains state to prevent too many requests
+                req.from_url(url)
+
+            if verbose:
+                print('{0} pulling request {1}'.format(self.name, task[1]))
+
+            try:
+                data = req.pull_data(ignore_errors=ignore_errors)
+            except IOError as err:
+                if 'Usage Limit' in str(err):
+                    self.queue.release(task_id, self.name)
+                    break
+                # "No data" answers won't change, so aren't worth retrying
+                retry = 'No data matches' not in str(err)
+                self.queue.fail(task_id, self.name, err, retry=retry)
+                continue
+            except Exception as err:
+                # e.g. malformed json responses; recorded so that the request
+                # is retried rather than taking down the worker
+                self.queue.fail(task_id, self.name, err)
+                continue
+
+            if self.queue.complete(task_id, self.name, data):
+                n_done += 1
+
+        return n_done
+
+    def __init__(self, queue, token=None, max_reqs=100, name=None):
+        if not isinstance(queue, WorkQueue):
+            queue = WorkQueue(queue)
+
+        self.queue = queue
+        self.token = token
+        self.max_reqs = max_reqs
+        self.name = name or '{0}:{1}'.format(gethostname(), getpid())
+
+    def __repr__(self):
+        out = 'Worker {0} on {1}'.format(self.name, self.queue.fpath)
+        return out
@@ -1,10 +1,11 @@
 from datetime import datetime as dt
-from io import StringIO
+from io import BytesIO, StringIO, TextIOWrapper
 from os.path import dirname, exists, join
 from pandas.parser import CParserError
 from time import sleep
 from .utils import _get_reporting_codes, _get_partner_codes
 
+import csv
 import json
 import pandas as pd
 import re
@@ -53,6 +54,33 @@ def _set_attr(obj, pattern, attr, url, dig=True):
                 setattr(obj, attr, find)
 
 
+def _partition(val, max_len):
+    '''Splits `val` into a list of chunks of at most `max_len` elements.
+
+    Inputs:
+        val : a single value or a list of values
+        max_len (int) : maximum number of elements per chunk
+
+    Output:
+        list of chunks; non-list values are returned as a single chunk
+    '''
+
+    res = []
+
+    if not isinstance(val, list):
+        return [val]
+
+    if len(val) > max_len:
+        while len(val) > max_len:
+            res.append(val[:max_len])
+            val = val[max_len:]
+
+    if len(val) > 0:
+        res.append(val)
+
+    return res
+
+
 class ComtradeURL(object):
     '''Class for manipulating and constructing valid UN Comtrade API URLs.
 
@@ -362,6 +390,7 @@ class ComtradeRequest(ComtradeURL):
         trade_type : Type of trades to pull ('C' for commodities, 'S' for services)
         url : URL to construct request from
         fmt : 'csv' or 'json', format to store data in
+        max_reqs : number of requests allowed before refusing to pull more (default 100)
     '''
 
     @classmethod
@@ -380,15 +409,15 @@ class ComtradeRequest(ComtradeURL):
 
         return cls(**args)
 
-    def pull_data(self, save=False, ignore_errors=False, **kwargs):
+    def _fetch(self, ignore_errors=False):
         '''
-        Actually queries the UN Comtrade Database to gather requested data,
-        taking into account usage limits.
+        Queries the UN Comtrade Database, taking into account usage limits.
 
         Inputs (optional):
-            save (string) : desired location to save data
             ignore_errors (boolean) : flag for whether to ignore "No Data" / "too complex" complaints
-            **kwargs : keyword arguments passed to pandas save function
+        Output:
+            (content, has_data) tuple of the raw response body (bytes) and
+            whether the query returned any data
         '''
 
         if hasattr(self, 'last_request'):
@@ -397,30 +426,147 @@ class ComtradeRequest(ComtradeURL):
             if time_elapsed < 1:
                sleep(1)
 
-        if self.n_reqs >= 100:
+        if self.n_reqs >= self.max_reqs:
             raise ValueError("Too many requests have been made! Take a break.")
 
         self.last_request = dt.now()
         r = requests.get(self._base_url)
         self.n_reqs += 1
-        content = r.content.decode('utf-8')
 
-        if "No data matches your query" in content:
+        if b"No data matches your query" in r.content:
             if not ignore_errors:
                 raise IOError("No data matches your query or your query is too complex!")
             else:
                 warnings.warn("Query {} returned no data or query was too complex!".format(self.base_url))
-                self.data = pd.DataFrame()
+                return r.content, False
+
+        return r.content, True
+
+    def _iter_rows(self, content):
+        # yields the header of a csv response, followed by its rows; decoding
+        # as we go avoids holding a decoded copy of the whole response
+        rows = csv.reader(TextIOWrapper(BytesIO(content), encoding='utf-8', newline=''))
+        header = next(rows, [])
+        yield header
+        for row in rows:
+            # like pandas, skip blank lines and pad short rows; only rows with
+            # too many fields are a parsing error
+            if not row:
+                continue
+            if len(row) > len(header):
+                raise IOError("Data Usage Limit exceeded! Try again in an hour.")
+            if len(row) < len(header):
+                row += [''] * (len(header) - len(row))
+            yield row
+
+    def _iter_records(self, content):
+        if self.fmt == 'csv':
+            rows = self._iter_rows(content)
+            header = next(rows)
+            for row in rows:
+                yield dict(zip(header, row))
+
+        if self.fmt == 'json':
+            try:
+                raw = json.loads(content.decode('utf-8'))
+            except ValueError as err:
+                raise IOError("Data Usage Limit exceeded! Try again in an hour.") from err
+            yield from raw['dataset']
+
+    def pull_records(self, ignore_errors=False):
+        '''
+        Queries the UN Comtrade Database like `pull_data`, but returns an
+        iterator over the records of the response instead of a pandas
+        DataFrame.  Each record is a dictionary mapping column names to values;
+        values of csv requests are left as strings.
+
+        Inputs (optional):
+            ignore_errors (boolean) : flag for whether to ignore "No Data" / "too complex" complaints
+        '''
+
+        content, has_data = self._fetch(ignore_errors=ignore_errors)
+        if not has_data:
+            return iter([])
+
+        return self._iter_records(content)
+
+    def pull_columns(self, ignore_errors=False, arrow=False):
+        '''
+        Queries the UN Comtrade Database like `pull_data`, but returns the
+        columns of the response as NumPy arrays instead of a pandas DataFrame.
+        The response is parsed with pyarrow, which must be installed.  As with
+        `pull_data`, columns without any values are dropped.
+
+        Inputs (optional):
+            ignore_errors (boolean) : flag for whether to ignore "No Data" / "too complex" complaints
+            arrow (boolean) : return the pyarrow Table instead of NumPy arrays
+        Output:
+            dictionary mapping column names to arrays, or a pyarrow Table
+        '''
+
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+        except ImportError as err:
+            raise ImportError("pyarrow is required to pull columns!") from err
+
+        content, has_data = self._fetch(ignore_errors=ignore_errors)
+        if not has_data:
+            return pa.table({}) if arrow else {}
 
         try:
             if self.fmt == 'csv':
-                self.data = pd.read_csv(StringIO(content))
+                table = pa_csv.read_csv(BytesIO(content))
             if self.fmt == 'json':
-                raw = json.loads(r.text)
-                data = json.dumps(raw['dataset'])
-                self.data = pd.read_json(data)
-        except CParserError as err:
-            raise IOError("Data Usage Limit exceeded! Try again in an hour.") from err
+                # the struct array takes the union of the keys of all records,
+                # where Table.from_pylist only uses those of the first one
+                records = pa.array(list(self._iter_records(content)))
+                table = pa.Table.from_struct_array(records) if len(records) else pa.table({})
+        except pa.ArrowInvalid as err:
+            if self.fmt == 'json':
+                raise IOError("Data Usage Limit exceeded! Try again in an hour.") from err
+            # arrow rejects rows with missing fields, which pandas pads; pad
+            # them ourselves (raising on rows with too many fields) and reparse
+            padded = StringIO()
+            csv.writer(padded).writerows(self._iter_rows(content))
+            table = pa_csv.read_csv(BytesIO(padded.getvalue().encode('utf-8')))
+
+        keep = [name for name, col in zip(table.column_names, table.columns)
+                if col.null_count < len(col)]
+        table = table.select(keep)
+
+        if arrow:
+            return table
+
+        return {name: col.to_numpy()
+                for name, col in zip(table.column_names, table.columns)}
+
+    def pull_data(self, save=False, ignore_errors=False, **kwargs):
+        '''
+        Actually queries the UN Comtrade Database to gather requested data,
+        taking into account usage limits.
+
+        Inputs (optional):
+            save (string) : desired location to save data
+            ignore_errors (boolean) : flag for whether to ignore "No Data" / "too complex" complaints
+            **kwargs : keyword arguments passed to pandas save function
+        '''
+
+        raw_content, has_data = self._fetch(ignore_errors=ignore_errors)
+
+        if not has_data:
+            self.data = pd.DataFrame()
+        else:
+            content = raw_content.decode('utf-8')
+            try:
+                if self.fmt == 'csv':
+                    self.data = pd.read_csv(StringIO(content))
+                if self.fmt == 'json':
+                    raw = json.loads(content)
+                    data = json.dumps(raw['dataset'])
+                    self.data = pd.read_json(data)
+            except CParserError as err:
+                raise IOError("Data Usage Limit exceeded! Try again in an hour.") from err
 
         self.data = self.data.dropna(axis=1, how='all')
 
@@ -440,10 +586,11 @@ class ComtradeRequest(ComtradeURL):
 
         return self.data
 
-    def __init__(self, **kwargs):
+    def __init__(self, max_reqs=100, **kwargs):
 
         super(ComtradeRequest, self).__init__(**kwargs)
         self.n_reqs = 0
+        self.max_reqs = max_reqs
 
     def __repr__(self):
         out = 'Current Comtrade Request URL: {}'.format(self._base_url)
@@ -483,20 +630,7 @@ class MultiRequest(object):
         return cls(**args)
 
     def _partition(self, val, max_len):
-        res = []
-
-        if not isinstance(val, list):
-            return [val]
-
-        if len(val) > max_len:
-            while len(val) > max_len:
-                res.append(val[:max_len])
-                val = val[max_len:]
-
-        if len(val) > 0:
-            res.append(val)
-
-        return res
+        return _partition(val, max_len)
 
     def pull_data(self, verbose=True, save=False, ignore_errors=False, **kwargs):
         '''
@@ -537,6 +671,34 @@ class MultiRequest(object):
             return df
 
 
+    def pull_records(self, verbose=True, ignore_errors=False):
+        '''
+        Queries the UN Comtrade Database like `pull_data`, but returns an
+        iterator over the records of all requests instead of a pandas
+        DataFrame; each request is only made once the records of the
+        previous one have been consumed.
+
+        Inputs (optional):
+            ignore_errors (boolean) : whether to ignore "No data" errors
+            verbose (boolean) : whether to print current request
+        '''
+
+        reqs_left = self.reqs.copy()
+        base_req = None
+
+        while len(reqs_left) > 0:
+            new_req = reqs_left.pop()
+            if base_req is None:
+                base_req = ComtradeRequest(url=new_req.base_url)
+            else:
+                # maintains state to prevent too many requests
+                base_req.from_url(new_req.base_url)
+
+            if verbose:
+                print('Pulling request {}'.format(base_req.base_url))
+
+            yield from base_req.pull_records(ignore_errors=ignore_errors)
+
     def __init__(self, hs=[], time_period=[], **kwargs):
         self.hs = self._partition(hs, 20)
         self.time_period = self._partition(time_period, 5)